@@ -1,20 +1,79 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional, Union
-from langchain.schema import AIMessage, HumanMessage, SystemMessage
-import json
-import asyncio
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response
+from starlette.types import Receive, Scope, Send
+from typing import AsyncGenerator, Dict, List, Optional, Type
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+import anyio
+import msgspec
+import orjson
+import uuid
 from ..core.config import get_llm
 
 router = APIRouter()
 
+# OpenAI chat roles mapped to their LangChain message classes
+_ROLE_MAP: Dict[str, Type[BaseMessage]] = {
+    "user": HumanMessage,
+    "assistant": AIMessage,
+    "system": SystemMessage,
+}
+
+# Streamed frames are flushed once this many bytes or tokens are buffered
+_STREAM_FLUSH_BYTES = 512
+_STREAM_FLUSH_TOKENS = 8
+
+# Response headers for streamed completions, pre-encoded for the ASGI send.
+# Cache-Control and X-Accel-Buffering keep reverse proxies (nginx, CDNs)
+# from buffering the stream.
+_SSE_HEADERS = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),
+    (b"connection", b"keep-alive"),
+]
+
+
+class EventStreamResponse(Response):
+    """Minimal SSE response that sends pre-encoded frames straight to ASGI.
+
+    Unlike StreamingResponse it does no per-chunk type checks or encoding and
+    runs no extra disconnect-listener task; the frame generator is expected
+    to watch for client disconnects itself.
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, body_iterator: AsyncGenerator[bytes, None]) -> None:
+        self.body_iterator = body_iterator
+        self.status_code = 200
+        self.background = None
+        self.raw_headers = list(_SSE_HEADERS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            async for frame in self.body_iterator:
+                await send(
+                    {"type": "http.response.body", "body": frame, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            # Run the generator's cleanup even if sending fails part-way
+            await self.body_iterator.aclose()
 
-class ChatMessage(BaseModel):
+
+class ChatMessage(msgspec.Struct):
     role: str  # "user", "assistant", "system"
     content: str
 
 
-class ChatRequest(BaseModel):
+class ChatRequest(msgspec.Struct):
     messages: List[ChatMessage]
     model: Optional[str] = None
     stream: bool = False
@@ -22,17 +81,9 @@ class ChatRequest(BaseModel):
     max_tokens: Optional[int] = None
 
 
-class ChatResponse(BaseModel):
-    id: str
-    object: str = "chat.completion"
-    model: str
-    choices: List[dict]
-
-
-@router.get("/v1/models")
-async def list_models():
-    """OpenWebUI compatible models endpoint"""
-    return {
+# The model list is static, so it is serialized once at import time
+_MODELS_BODY = orjson.dumps(
+    {
         "object": "list",
         "data": [
             {
@@ -46,98 +97,133 @@ async def list_models():
             }
         ],
     }
+)
+
+
+@router.get("/v1/models")
+async def list_models():
+    """OpenWebUI compatible models endpoint"""
+    return Response(content=_MODELS_BODY, media_type="application/json")
 
 
 @router.post("/v1/chat/completions")
-async def chat_completions(request: ChatRequest):
+async def chat_completions(raw_request: Request):
     """OpenWebUI compatible chat endpoint"""
 
+    # Decode and validate the body in a single pass with msgspec
     try:
-        # Convert messages to LangChain format
-        langchain_messages: List[Union[HumanMessage, AIMessage, SystemMessage]] = []
-        for msg in request.messages:
-            if msg.role == "user":
-
-                langchain_messages.append(HumanMessage(content=msg.content))
-            elif msg.role == "assistant":
+        request = msgspec.json.decode(await raw_request.body(), type=ChatRequest)
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-                langchain_messages.append(AIMessage(content=msg.content))
-            elif msg.role == "system":
-
-                langchain_messages.append(SystemMessage(content=msg.content))
+    try:
+        # Convert messages to LangChain format, skipping unknown roles
+        langchain_messages: List[BaseMessage] = [
+            _ROLE_MAP[msg.role](content=msg.content)
+            for msg in request.messages
+            if msg.role in _ROLE_MAP
+        ]
 
         # Get LLM and generate response
         llm = get_llm(request.model)
 
         if request.stream:
-            return await _stream_response(
-                langchain_messages, llm, request.model or "langchain-agent-hub"
+            return _stream_response(
+                langchain_messages,
+                llm,
+                request.model or "langchain-agent-hub",
+                raw_request,
             )
         else:
             response = await llm.ainvoke(langchain_messages)
 
-            return ChatResponse(
-                id="chatcmpl-" + "123456789",  # Generate proper ID later
-                model=request.model or "langchain-agent-hub",
-                choices=[
-                    {
-                        "index": 0,
-                        "message": {"role": "assistant", "content": response.content},
-                        "finish_reason": "stop",
-                    }
-                ],
+            return ORJSONResponse(
+                {
+                    "id": "chatcmpl-" + "123456789",  # Generate proper ID later
+                    "object": "chat.completion",
+                    "model": request.model or "langchain-agent-hub",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": response.content,
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
             )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def _stream_response(messages, llm, model_name):
+def _stream_response(messages, llm, model_name, raw_request):
     """Handle streaming responses for OpenWebUI"""
-    from fastapi.responses import StreamingResponse
+    # Every chunk shares the same id/object/model envelope, so serialize it
+    # once and only encode the per-token delta inside the loop
+    req_id = "chatcmpl-" + uuid.uuid4().hex[:12]
+    prefix = (
+        b'data: {"id":'
+        + orjson.dumps(req_id)
+        + b',"object":"chat.completion.chunk","model":'
+        + orjson.dumps(model_name)
+        + b',"choices":[{"index":0,"delta":'
+    )
 
     async def generate():
+        # Coalesce small SSE frames so each write to the socket carries
+        # several tokens; the first token is always sent immediately
+        buf = bytearray()
+        pending = 0
+        first = True
+        stream = llm.astream(messages)
         try:
-            # For now, simulate streaming with the non-streaming response
-            # We'll implement proper streaming in Phase 2
-            response = await llm.ainvoke(messages)
-
-            # Split response into chunks for streaming simulation
-            words = response.content.split()
-            for i, word in enumerate(words):
-                chunk = {
-                    "id": "chatcmpl-123456789",
-                    "object": "chat.completion.chunk",
-                    "model": model_name,
-                    "choices": [
-                        {
-                            "index": 0,
-                            "delta": {"content": word + " "},
-                            "finish_reason": None,
-                        }
-                    ],
-                }
-                yield f"data: {json.dumps(chunk)}\n\n"
-                await asyncio.sleep(0.01)  # Small delay for streaming effect
+            async for token in stream:
+                if not token.content:
+                    continue
+                buf += prefix
+                buf += b'{"content":'
+                buf += orjson.dumps(token.content)
+                buf += b'},"finish_reason":null}]}\n\n'
+                pending += 1
+                if (
+                    first
+                    or pending >= _STREAM_FLUSH_TOKENS
+                    or len(buf) >= _STREAM_FLUSH_BYTES
+                ):
+                    # Stop pulling billable tokens once the client has gone
+                    if await raw_request.is_disconnected():
+                        return
+                    yield bytes(buf)
+                    buf.clear()
+                    pending = 0
+                    first = False
 
             # Final chunk
-            final_chunk = {
-                "id": "chatcmpl-123456789",
-                "object": "chat.completion.chunk",
-                "model": model_name,
-                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
-            }
-            yield f"data: {json.dumps(final_chunk)}\n\n"
-            yield "data: [DONE]\n\n"
+            buf += prefix + b'{},"finish_reason":"stop"}]}\n\n'
+            buf += b"data: [DONE]\n\n"
+            yield bytes(buf)
 
         except Exception as e:
             error_chunk = {"error": {"message": str(e), "type": "error"}}
-            yield f"data: {json.dumps(error_chunk)}\n\n"
+            buf += b"data: " + orjson.dumps(error_chunk) + b"\n\n"
+            yield bytes(buf)
+
+        finally:
+            # Tear down the upstream request on disconnect or cancellation
+            # instead of leaving it to run until garbage collection
+            with anyio.CancelScope(shield=True):
+                await stream.aclose()
+
+    return EventStreamResponse(generate())
+
 
-    return StreamingResponse(generate(), media_type="text/plain")
+_HEALTH_BODY = orjson.dumps({"status": "healthy", "service": "langchain-agent-hub"})
 
 
 @router.get("/health")
 async def health_check():
     """Simple health check endpoint"""
-    return {"status": "healthy", "service": "langchain-agent-hub"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
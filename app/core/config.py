@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 from pydantic import SecretStr
@@ -34,8 +35,13 @@ class Settings(BaseSettings):
 settings = Settings()
 
 
+@lru_cache(maxsize=16)
 def get_llm(model_name: Optional[str] = None):
-    """Factory function to create LLM instances"""
+    """Factory function to create LLM instances
+
+    Instances are cached per model name so their HTTP client and its pooled
+    connections are reused across requests.
+    """
     from langchain_openai import ChatOpenAI
 
     if settings.openrouter_api_key is None:
@@ -0,0 +1,51 @@
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class SSECompressionMiddleware:
+    """Gzip ``text/event-stream`` responses one event at a time.
+
+    Each body message is compressed and flushed with ``Z_SYNC_FLUSH`` so the
+    client can decode it as soon as it arrives, while the JSON envelope that
+    repeats on every chunk still compresses across events through the shared
+    zlib window. Other responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, compresslevel: int = 6) -> None:
+        self.app = app
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get(
+            "accept-encoding", ""
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        compressor = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal compressor
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if (
+                    headers.get("content-type", "").startswith("text/event-stream")
+                    and "content-encoding" not in headers
+                ):
+                    # wbits=31 selects the gzip container
+                    compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, 31)
+                    headers["Content-Encoding"] = "gzip"
+                    headers.add_vary_header("Accept-Encoding")
+                    if "content-length" in headers:
+                        del headers["content-length"]
+            elif message["type"] == "http.response.body" and compressor is not None:
+                body = compressor.compress(message.get("body", b""))
+                if message.get("more_body", False):
+                    body += compressor.flush(zlib.Z_SYNC_FLUSH)
+                else:
+                    body += compressor.flush()
+                message["body"] = body
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
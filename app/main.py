@@ -1,8 +1,11 @@
 # app/main.py
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, Response
+import orjson
 from fastapi.middleware.cors import CORSMiddleware
 from .api.routes import router
 from .core.config import settings
+from .core.middleware import SSECompressionMiddleware
 from app import __version__
 
 # Create FastAPI app
@@ -10,6 +13,7 @@ app = FastAPI(
     title="LangChain Agent Hub",
     description="Multi-agent system with FastAPI interface for OpenWebUI",
     version=__version__,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware for OpenWebUI integration
@@ -21,20 +25,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress streamed completions event by event without buffering the stream
+app.add_middleware(SSECompressionMiddleware)
+
 # Include API routes
 app.include_router(router)
 
 
-@app.get("/")
-async def root():
-    return {
+_ROOT_BODY = orjson.dumps(
+    {
         "message": "LangChain Agent Hub is running!",
         "version": __version__,
         "status": "ready",
     }
+)
+
+
+@app.get("/")
+async def root():
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("app.main:app", host=settings.host, port=settings.port, reload=True)
+    uvicorn.run(
+        "app.main:app",
+        host=settings.host,
+        port=settings.port,
+        reload=True,
+        # "auto" selects uvloop where it is installed (not on Windows)
+        loop="auto",
+        http="httptools",
+        log_level="warning",
+    )
@@ -10,26 +10,28 @@ This script provides multiple ways to run tests:
 - Run tests in parallel
 """
 
+import os
 import sys
-import subprocess
 import argparse
 from pathlib import Path
 
+import pytest
 
-def run_command(cmd, description):
-    """Run a shell command and handle errors."""
+
+def run_pytest(args, description):
+    """Run pytest in the current interpreter and report the outcome."""
     print(f"\n{'='*60}")
     print(f"Running: {description}")
-    print(f"Command: {' '.join(cmd)}")
+    print(f"Command: pytest {' '.join(args)}")
     print("=" * 60)
 
-    try:
-        _ = subprocess.run(cmd, check=True, cwd=Path(__file__).parent)
+    os.chdir(Path(__file__).parent)
+    exit_code = pytest.main(args)
+    if exit_code == 0:
         print(f"{description} completed successfully")
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"{description} failed with exit code {e.returncode}")
-        return False
+    print(f"{description} failed with exit code {int(exit_code)}")
+    return False
 
 
 def main():
@@ -59,21 +61,21 @@ def main():
 
     args = parser.parse_args()
 
-    # Build pytest command
-    pytest_cmd = ["python", "-m", "pytest"]
+    # Build pytest arguments
+    pytest_args = []
 
     # Add options based on arguments
     if args.unit:
-        pytest_cmd.extend(["-m", "not integration and not slow"])
+        pytest_args.extend(["-m", "not integration and not slow"])
     elif args.integration:
-        pytest_cmd.extend(["-m", "integration"])
+        pytest_args.extend(["-m", "integration"])
     else:
         # Run all tests by default, but exclude slow unless specified
         if not args.slow:
-            pytest_cmd.extend(["-m", "not slow"])
+            pytest_args.extend(["-m", "not slow"])
 
     if args.coverage:
-        pytest_cmd.extend(
+        pytest_args.extend(
             [
                 "--cov=app",
                 "--cov-report=term",
@@ -83,24 +85,27 @@ def main():
         )
 
     if args.parallel:
-        pytest_cmd.extend(["-n", "auto"])
+        # One file per worker keeps the port-bound integration tests together
+        pytest_args.extend(["-n", "auto", "--dist=loadfile"])
 
     if args.verbose:
-        pytest_cmd.append("-v")
+        pytest_args.append("-v")
 
     if args.failed_first:
-        pytest_cmd.append("--failed-first")
+        pytest_args.append("--failed-first")
 
     if args.ci:
-        pytest_cmd.extend(
+        # Skip .pyc writes during collection; the CI checkout is thrown away
+        sys.dont_write_bytecode = True
+        pytest_args.extend(
             ["--junitxml=junit.xml", "--cov-report=xml", "-q"]  # Quiet mode for CI
         )
 
     # Add test directory
-    pytest_cmd.append("tests/")
+    pytest_args.append("tests/")
 
-    # Run the command
-    success = run_command(pytest_cmd, "Test Suite")
+    # Run the suite in-process to avoid a second interpreter start-up
+    success = run_pytest(pytest_args, "Test Suite")
 
     if success:
         print("\nAll tests passed.")
@@ -2,6 +2,9 @@ import re
 import sys
 from pathlib import Path
 
+_VERSION_RE = re.compile(r'^__version__ = ".*"', re.MULTILINE)
+_DOCS_RE = re.compile(rb"^\*\*Current Version\*\*: [^\r\n]*", re.MULTILINE)
+
 
 def bump_version(new_version):
     """Update version in all files to the new version."""
@@ -10,8 +13,8 @@ def bump_version(new_version):
     version_file = Path("app/__init__.py")
     if version_file.exists():
         content = version_file.read_text()
-        updated_content = re.sub(
-            r'__version__ = ".*"', f'__version__ = "{new_version}"', content
+        updated_content = _VERSION_RE.sub(
+            f'__version__ = "{new_version}"', content, count=1
         )
         version_file.write_text(updated_content)
         print(f"Updated app/__init__.py to version {new_version}")
@@ -21,13 +24,12 @@ def bump_version(new_version):
     # Update docs/index.md
     docs_file = Path("docs/index.md")
     if docs_file.exists():
-        docs_content = docs_file.read_text()
-        updated_docs = re.sub(
-            r"\*\*Current Version\*\*: .*",
-            f"**Current Version**: {new_version}",
-            docs_content,
+        # Work on raw bytes to skip decoding the whole document
+        docs_content = docs_file.read_bytes()
+        updated_docs = _DOCS_RE.sub(
+            f"**Current Version**: {new_version}".encode(), docs_content, count=1
         )
-        docs_file.write_text(updated_docs)
+        docs_file.write_bytes(updated_docs)
         print(f"Updated docs/index.md to version {new_version}")
     else:
         print("Warning: docs/index.md not found")
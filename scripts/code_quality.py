@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # scripts/code_quality.py - Run black, ruff, and mypy with check/fix modes
 
+import asyncio
 import sys
 from utils import run_parallel_commands, print_summary
 
@@ -54,7 +55,7 @@ def main():
     tool_names = ["Black", "Ruff", "Mypy"]
 
     # Run all commands in parallel
-    results = run_parallel_commands(commands, capture_output=True)
+    results = asyncio.run(run_parallel_commands(commands, capture_output=True))
 
     # Print summary
     overall_success = print_summary(results, tool_names)
@@ -1,8 +1,25 @@
 #!/usr/bin/env python3
 # scripts/utils.py - Shared utilities for scripts
 
+import asyncio
 import subprocess
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+
+def _report_result(
+    desc: str, returncode: Optional[int], output: str, capture_output: bool
+) -> bool:
+    """Print the outcome of a finished command and return whether it succeeded."""
+    success = returncode == 0
+
+    if success:
+        print(f"✅ {desc} completed successfully")
+    else:
+        print(f"❌ {desc} failed with exit code {returncode}")
+        if capture_output and output:
+            print(f"   Output: {output}")
+
+    return success
 
 
 def run_cmd(
@@ -29,26 +46,48 @@ def run_cmd(
             result = subprocess.run(cmd)
             output = ""
 
-        success = result.returncode == 0
+        return _report_result(desc, result.returncode, output, capture_output), output
 
-        if success:
-            print(f"✅ {desc} completed successfully")
-        else:
-            print(f"❌ {desc} failed with exit code {result.returncode}")
-            if capture_output and output:
-                print(f"   Output: {output}")
+    except Exception as e:
+        print(f"❌ {desc} failed with exception: {e}")
+        return False, str(e)
 
-        return success, output
+
+async def run_cmd_async(
+    cmd: List[str], desc: str, capture_output: bool = False
+) -> Tuple[bool, str]:
+    """Asyncio counterpart of run_cmd, reaping output on the event loop.
+
+    Args:
+        cmd: Command to run as list of strings
+        desc: Description of what the command does
+        capture_output: Whether to capture and return output
+
+    Returns:
+        Tuple of (success: bool, output: str)
+    """
+    print(f"📝 {desc}...")
+    print(f"   Command: {' '.join(cmd)}")
+
+    try:
+        pipe = asyncio.subprocess.PIPE if capture_output else None
+        process = await asyncio.create_subprocess_exec(*cmd, stdout=pipe, stderr=pipe)
+        stdout, stderr = await process.communicate()
+        output = ""
+        if capture_output:
+            output = stdout.decode(errors="replace") + stderr.decode(errors="replace")
+
+        return _report_result(desc, process.returncode, output, capture_output), output
 
     except Exception as e:
         print(f"❌ {desc} failed with exception: {e}")
         return False, str(e)
 
 
-def run_parallel_commands(
+async def run_parallel_commands(
     commands: List[Tuple[List[str], str]], capture_output: bool = False
 ) -> List[Tuple[bool, str]]:
-    """Run multiple commands in parallel and collect results.
+    """Run multiple commands concurrently and collect results.
 
     Args:
         commands: List of (command, description) tuples
@@ -57,16 +96,11 @@ def run_parallel_commands(
     Returns:
         List of (success, output) tuples for each command
     """
-    import concurrent.futures
-
-    def run_single(cmd_desc):
-        cmd, desc = cmd_desc
-        return run_cmd(cmd, desc, capture_output)
-
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        results = list(executor.map(run_single, commands))
-
-    return results
+    return list(
+        await asyncio.gather(
+            *(run_cmd_async(cmd, desc, capture_output) for cmd, desc in commands)
+        )
+    )
 
 
 def merge_arguments(default_args: List[str], user_args: List[str]) -> List[str]:
@@ -79,40 +113,23 @@ def merge_arguments(default_args: List[str], user_args: List[str]) -> List[str]:
     Returns:
         Merged argument list
     """
-    merged = []
-    default_flags = set()
+    # User args are kept verbatim and come first; note which flags they set
+    user_flags = {arg.split("=")[0] for arg in user_args if arg.startswith("-")}
+    merged = list(user_args)
 
-    # Extract flags from default args (skip values that follow flags)
-    i = 0
-    while i < len(default_args):
-        arg = default_args[i]
-        if arg.startswith("-"):
-            default_flags.add(arg.split("=")[0])  # Handle --flag=value format
-            if i + 1 < len(default_args) and not default_args[i + 1].startswith("-"):
-                i += 1  # Skip the value
-        i += 1
-
-    # Add user args first (they take precedence)
-    for arg in user_args:
-        if arg.startswith("-"):
-            # Remove conflicting default flags
-            flag = arg.split("=")[0]
-            if flag in default_flags:
-                default_flags.remove(flag)
-        merged.append(arg)
-
-    # Add remaining default args that weren't overridden
+    # Walk the defaults once, keeping each flag (and its value) unless overridden
     i = 0
     while i < len(default_args):
         arg = default_args[i]
-        flag = arg.split("=")[0] if arg.startswith("-") else None
-
-        if flag and flag in default_flags:
-            merged.append(arg)
-            if i + 1 < len(default_args) and not default_args[i + 1].startswith("-"):
-                merged.append(default_args[i + 1])
-                i += 1  # Skip the value
-        i += 1
+        has_value = (
+            arg.startswith("-")
+            and i + 1 < len(default_args)
+            and not default_args[i + 1].startswith("-")
+        )
+        group = default_args[i : i + 2] if has_value else [arg]
+        if arg.startswith("-") and arg.split("=")[0] not in user_flags:
+            merged.extend(group)
+        i += len(group)
 
     return merged
 
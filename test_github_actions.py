@@ -10,6 +10,12 @@ import os
 import yaml
 import importlib.util
 
+try:
+    # libyaml-backed loader, much faster when PyYAML was built with it
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
 
 def check_package_available(spec):
     """Check if package is available and return status."""
@@ -29,8 +35,8 @@ def check_file_exists(filepath):
 def validate_yaml(filepath):
     """Validate YAML syntax."""
     try:
-        with open(filepath, "r") as f:
-            yaml.safe_load(f)
+        with open(filepath, "rb") as f:
+            yaml.load(f, Loader=SafeLoader)
         return "✅", True
     except yaml.YAMLError as e:
         return f"❌ ({str(e)})", False
@@ -1,30 +1,81 @@
 import pytest
+import pytest_asyncio
 import asyncio
+import httpx
+import json
+import orjson
 from unittest.mock import patch, AsyncMock
 from fastapi.testclient import TestClient
 from app.main import app
-from langchain.schema import AIMessage
+from app.api import routes as _routes
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+
+def _astream_of(content, error=None):
+    """Build an ``astream`` replacement that yields ``content`` word by word."""
+
+    async def astream(messages):
+        if error is not None:
+            raise error
+        for word in content.split():
+            yield AIMessageChunk(content=word + " ")
+
+    return astream
+
+
+# Canned replies are built once; AIMessage construction runs Pydantic validation
+_MOCKED_AI_RESPONSE = AIMessage(content="Mocked AI response")
+_MOCKED_STREAMING_RESPONSE = AIMessage(content="Mocked streaming response")
+
+
+def _configure_llm(llm, reply, error=None):
+    """Point the shared mock LLM at a canned reply, or make it fail with ``error``."""
+    # Drop call history left over from earlier tests in the session
+    llm.reset_mock()
+    llm.ainvoke.return_value = reply
+    llm.ainvoke.side_effect = error
+    llm.astream = _astream_of(reply.content, error)
+    return llm
+
+
+def json_of(response):
+    """Decode a response body with orjson instead of ``response.json()``."""
+    return orjson.loads(response.content)
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def event_loop_policy():
+    """Run async tests on uvloop where it is available."""
+    try:
+        import uvloop
+    except ImportError:  # uvloop does not support Windows
+        return asyncio.get_event_loop_policy()
+    return uvloop.EventLoopPolicy()
 
 
-@pytest.fixture
-def mock_llm():
-    """Mock the LLM factory function to return a controlled response."""
-    with patch("app.api.routes.get_llm") as mock:
-        mock_llm_instance = AsyncMock()
-        mock_llm_instance.ainvoke.return_value = AIMessage(content="Mocked AI response")
+@pytest.fixture(scope="session")
+def _patched_llm():
+    """Patch the LLM factory once per session and share one mock instance.
+
+    Once the first mock fixture starts it, the patch stays active for the rest
+    of the session. Tests that reach the LLM should still request a mock
+    fixture so the reply does not depend on which test ran before them.
+    """
+    with patch.object(_routes, "get_llm") as mock:
+        # Spec against the chat model interface so misspelt attributes fail
+        mock_llm_instance = AsyncMock(spec_set=BaseChatModel)
         mock.return_value = mock_llm_instance
-        yield mock
+        yield mock_llm_instance
 
 
 @pytest.fixture
+def mock_llm(_patched_llm):
+    """Mock the LLM factory function to return a controlled response."""
+    return _configure_llm(_patched_llm, _MOCKED_AI_RESPONSE)
+
+
+@pytest.fixture(scope="session")
 def mock_env():
     """Mock environment variables for testing."""
     with patch.dict(
@@ -37,16 +88,26 @@ def mock_env():
         yield
 
 
-@pytest.fixture
-def client(mock_llm, mock_env):
-    """Create a test client with mocked dependencies."""
+@pytest.fixture(scope="session")
+def client(mock_env):
+    """Create a test client shared by the whole session.
+
+    The LLM mock is configured per test, so tests that reach the LLM must request
+    ``mock_llm`` (or one of its variants) themselves.
+    """
     with TestClient(app) as test_client:
         yield test_client
 
 
-@pytest.fixture
-def chat_request_data():
-    """Sample chat request data for testing."""
+@pytest_asyncio.fixture
+async def aclient():
+    """Async client that drives the app on the test's own event loop."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+def _chat_request():
     return {
         "messages": [
             {
@@ -59,6 +120,18 @@ def chat_request_data():
     }
 
 
+@pytest.fixture
+def chat_request_data():
+    """Sample chat request data for testing."""
+    return _chat_request()
+
+
+@pytest.fixture(scope="session")
+def chat_request_bytes():
+    """The sample chat request pre-encoded once for tests that post it as-is."""
+    return orjson.dumps(_chat_request())
+
+
 @pytest.fixture
 def streaming_chat_request_data():
     """Sample streaming chat request data for testing."""
@@ -75,13 +148,11 @@ def invalid_chat_request_data():
 
 
 @pytest.fixture
-def mock_openrouter_error():
+def mock_openrouter_error(_patched_llm):
     """Mock an OpenRouter API error."""
-    with patch("app.api.routes.get_llm") as mock:
-        mock_llm_instance = AsyncMock()
-        mock_llm_instance.ainvoke.side_effect = Exception("OpenRouter API error")
-        mock.return_value = mock_llm_instance
-        yield mock
+    return _configure_llm(
+        _patched_llm, _MOCKED_AI_RESPONSE, error=Exception("OpenRouter API error")
+    )
 
 
 class MockStreamingResponse:
@@ -90,43 +161,30 @@ class MockStreamingResponse:
     def __init__(self, content="Mocked streaming response"):
         self.content = content
         self.words = content.split()
-
-    async def generate(self):
-        """Generate streaming response chunks."""
-        for i, word in enumerate(self.words):
-            chunk = {
-                "id": "chatcmpl-test-123",
-                "object": "chat.completion.chunk",
-                "model": "deepseek/deepseek-v3.1-terminus",
-                "choices": [
-                    {
-                        "index": 0,
-                        "delta": {"content": word + " "},
-                        "finish_reason": None,
-                    }
-                ],
-            }
-            yield f"data: {chunk}\n\n"
-            await asyncio.sleep(0.01)
-
-        # Final chunk
-        final_chunk = {
+        # The frames never change, so build them once up front
+        self._chunks = [
+            f"data: {json.dumps(self._chunk({'content': word + ' '}, None))}\n\n"
+            for word in self.words
+        ]
+        self._chunks.append(f"data: {json.dumps(self._chunk({}, 'stop'))}\n\n")
+        self._chunks.append("data: [DONE]\n\n")
+
+    @staticmethod
+    def _chunk(delta, finish_reason):
+        return {
             "id": "chatcmpl-test-123",
             "object": "chat.completion.chunk",
             "model": "deepseek/deepseek-v3.1-terminus",
-            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
         }
-        yield f"data: {final_chunk}\n\n"
-        yield "data: [DONE]\n\n"
+
+    async def generate(self):
+        """Generate streaming response chunks."""
+        for chunk in self._chunks:
+            yield chunk
 
 
 @pytest.fixture
-def mock_streaming_llm():
+def mock_streaming_llm(_patched_llm):
     """Mock LLM for streaming responses."""
-    with patch("app.api.routes.get_llm") as mock:
-        mock_llm_instance = AsyncMock()
-        mock_llm_instance.ainvoke.return_value = AIMessage(
-            content="Mocked streaming response"
-        )
-        mock.return_value = mock_llm_instance
-        yield mock
+    return _configure_llm(_patched_llm, _MOCKED_STREAMING_RESPONSE)
@@ -1,6 +1,47 @@
-import pytest
+import asyncio
+import httpx
 import json
+import re
 from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessageChunk
+from app.api.routes import _stream_response
+from tests.conftest import json_of
+
+_SSE_RE = re.compile(r"^data: (.+)$", re.M)
+
+
+def _parse_sse(text):
+    """Return the payload of every ``data:`` line in an SSE body."""
+    return [m.group(1) for m in _SSE_RE.finditer(text)]
+
+
+class FakeStreamingLLM:
+    """LLM stand-in whose astream yields a fixed number of tokens."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.produced = 0
+        self.closed = False
+
+    async def astream(self, messages):
+        try:
+            for i in range(self.tokens):
+                self.produced += 1
+                yield AIMessageChunk(content=f"t{i} ")
+        finally:
+            self.closed = True
+
+
+class FakeRequest:
+    """Request stand-in reporting a disconnect after a number of checks."""
+
+    def __init__(self, disconnect_after=None):
+        self.disconnect_after = disconnect_after
+        self.checks = 0
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.disconnect_after is not None and self.checks > self.disconnect_after
 
 
 class TestChatCompletions:
@@ -13,7 +54,7 @@ class TestChatCompletions:
         response = client.post("/v1/chat/completions", json=chat_request_data)
         assert response.status_code == 200
 
-        data = response.json()
+        data = json_of(response)
         assert data["id"] == "chatcmpl-123456789"
         assert data["object"] == "chat.completion"
         assert data["model"] == "deepseek/deepseek-v3.1-terminus"
@@ -35,7 +76,7 @@ class TestChatCompletions:
         response = client.post("/v1/chat/completions", json=request_data)
         assert response.status_code == 200
 
-        data = response.json()
+        data = json_of(response)
         assert data["model"] == "langchain-agent-hub"
 
     def test_chat_completion_different_roles(self, client: TestClient, mock_llm):
@@ -52,7 +93,7 @@ class TestChatCompletions:
         response = client.post("/v1/chat/completions", json=request_data)
         assert response.status_code == 200
 
-        data = response.json()
+        data = json_of(response)
         assert data["choices"][0]["message"]["content"] == "Mocked AI response"
 
     def test_chat_completion_with_parameters(self, client: TestClient, mock_llm):
@@ -67,7 +108,7 @@ class TestChatCompletions:
         response = client.post("/v1/chat/completions", json=request_data)
         assert response.status_code == 200
 
-        data = response.json()
+        data = json_of(response)
         assert data["model"] == "deepseek/deepseek-v3.1-terminus"
 
 
@@ -80,23 +121,19 @@ class TestStreamingChatCompletions:
         """Test successful streaming chat completion."""
         response = client.post("/v1/chat/completions", json=streaming_chat_request_data)
         assert response.status_code == 200
-        assert response.headers["content-type"] == "text/plain; charset=utf-8"
+        assert response.headers["content-type"] == "text/event-stream; charset=utf-8"
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.headers["x-accel-buffering"] == "no"
 
-        # Parse streaming response
-        content = response.text
-        lines = [line for line in content.split("\n") if line.strip()]
+        payloads = _parse_sse(response.text)
 
-        # Should have data lines and a [DONE] line
-        assert len(lines) > 0
-        assert any("data: [DONE]" in line for line in lines)
+        # Should end with the [DONE] sentinel
+        assert payloads[-1] == "[DONE]"
 
-        # Check that we have proper SSE format
-        for line in lines:
-            if line.startswith("data: "):
-                if line != "data: [DONE]":
-                    chunk_data = json.loads(line[6:])  # Remove "data: " prefix
-                    assert "choices" in chunk_data
-                    assert len(chunk_data["choices"]) == 1
+        # Every other event is a JSON chunk with a single choice
+        for chunk_data in map(json.loads, payloads[:-1]):
+            assert "choices" in chunk_data
+            assert len(chunk_data["choices"]) == 1
 
     def test_streaming_response_content(self, client: TestClient, mock_streaming_llm):
         """Test streaming response contains expected content chunks."""
@@ -107,26 +144,64 @@ class TestStreamingChatCompletions:
         response = client.post("/v1/chat/completions", json=request_data)
         assert response.status_code == 200
 
-        content = response.text
-        lines = [
-            line
-            for line in content.split("\n")
-            if line.strip() and line.startswith("data: ")
-        ]
+        payloads = _parse_sse(response.text)
 
         # Should have multiple data chunks
-        assert len(lines) > 1
+        assert len(payloads) > 1
 
-        # Last line should be [DONE]
-        assert lines[-1] == "data: [DONE]"
+        # Last event should be [DONE]
+        assert payloads[-1] == "[DONE]"
 
         # Check content chunks
-        for line in lines[:-1]:  # Exclude [DONE] line
-            if line != "data: [DONE]":
-                chunk_data = json.loads(line[6:])
-                choice = chunk_data["choices"][0]
-                if "delta" in choice and "content" in choice["delta"]:
-                    assert isinstance(choice["delta"]["content"], str)
+        streamed = ""
+        for chunk_data in map(json.loads, payloads[:-1]):
+            choice = chunk_data["choices"][0]
+            if "delta" in choice and "content" in choice["delta"]:
+                assert isinstance(choice["delta"]["content"], str)
+                streamed += choice["delta"]["content"]
+
+        # Tokens are forwarded from llm.astream as they arrive
+        assert streamed.split() == ["Mocked", "streaming", "response"]
+
+    def test_streaming_chunks_share_request_id(
+        self, client: TestClient, streaming_chat_request_data, mock_streaming_llm
+    ):
+        """Test every chunk of one stream carries the same generated id."""
+        response = client.post("/v1/chat/completions", json=streaming_chat_request_data)
+        assert response.status_code == 200
+
+        chunks = list(map(json.loads, _parse_sse(response.text)[:-1]))
+        ids = {chunk["id"] for chunk in chunks}
+        assert len(ids) == 1
+        assert ids.pop().startswith("chatcmpl-")
+        assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+        assert all(chunk["model"] == "langchain-agent-hub" for chunk in chunks)
+
+    def test_streaming_response_gzip(
+        self, client: TestClient, streaming_chat_request_data, mock_streaming_llm
+    ):
+        """Test streamed events are gzipped when the client accepts it."""
+        response = client.post(
+            "/v1/chat/completions",
+            json=streaming_chat_request_data,
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text.endswith("data: [DONE]\n\n")
+
+    def test_streaming_response_identity(
+        self, client: TestClient, streaming_chat_request_data, mock_streaming_llm
+    ):
+        """Test streamed events are sent as-is when gzip is not accepted."""
+        response = client.post(
+            "/v1/chat/completions",
+            json=streaming_chat_request_data,
+            headers={"Accept-Encoding": "identity"},
+        )
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert response.text.endswith("data: [DONE]\n\n")
 
 
 class TestChatCompletionErrorHandling:
@@ -137,16 +212,17 @@ class TestChatCompletionErrorHandling:
         request_data = {"model": "deepseek/deepseek-v3.1-terminus", "stream": False}
         response = client.post("/v1/chat/completions", json=request_data)
         assert response.status_code == 422  # Validation error
+        assert "messages" in json_of(response)["detail"]
 
     def test_chat_completion_empty_messages(
-        self, client: TestClient, invalid_chat_request_data
+        self, client: TestClient, invalid_chat_request_data, mock_llm
     ):
         """Test chat completion with empty messages array."""
         response = client.post("/v1/chat/completions", json=invalid_chat_request_data)
         # Empty messages might be handled gracefully or cause an error
         assert response.status_code in [200, 500]
 
-    def test_chat_completion_invalid_model(self, client: TestClient):
+    def test_chat_completion_invalid_model(self, client: TestClient, mock_llm):
         """Test chat completion with invalid model name."""
         request_data = {
             "messages": [{"role": "user", "content": "Hello"}],
@@ -164,21 +240,31 @@ class TestChatCompletionErrorHandling:
         """Test chat completion when OpenRouter API returns an error."""
         response = client.post("/v1/chat/completions", json=chat_request_data)
         assert response.status_code == 500
-        data = response.json()
+        data = json_of(response)
         assert "detail" in data
         # The actual error message from the mock
         assert "OpenRouter API error" in data["detail"]
 
+    def test_streaming_chat_completion_openrouter_error(
+        self, client: TestClient, streaming_chat_request_data, mock_openrouter_error
+    ):
+        """Test upstream errors mid-stream are reported as an SSE error event."""
+        response = client.post("/v1/chat/completions", json=streaming_chat_request_data)
+        assert response.status_code == 200
+
+        (payload,) = _parse_sse(response.text)
+        error = json.loads(payload)
+        assert error["error"]["message"] == "OpenRouter API error"
+
     def test_chat_completion_missing_api_key(
-        self, client: TestClient, chat_request_data
+        self, client: TestClient, chat_request_data, mock_llm, monkeypatch
     ):
         """Test chat completion when OpenRouter API key is missing."""
         # Mock the environment to have no API key
-        with pytest.MonkeyPatch().context() as m:
-            m.delenv("OPENROUTER_API_KEY", raising=False)
-            response = client.post("/v1/chat/completions", json=chat_request_data)
-            # Since the LLM is mocked, we get a successful response
-            assert response.status_code == 200
+        monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+        response = client.post("/v1/chat/completions", json=chat_request_data)
+        # Since the LLM is mocked, we get a successful response
+        assert response.status_code == 200
 
     def test_chat_completion_invalid_json(self, client: TestClient):
         """Test chat completion with invalid JSON payload."""
@@ -190,12 +276,12 @@ class TestChatCompletionErrorHandling:
         assert response.status_code == 422  # Unprocessable Entity
 
     def test_chat_completion_wrong_content_type(
-        self, client: TestClient, chat_request_data
+        self, client: TestClient, chat_request_bytes, mock_llm
     ):
         """Test chat completion with wrong content type."""
         response = client.post(
             "/v1/chat/completions",
-            data=json.dumps(chat_request_data),
+            content=chat_request_bytes,
             headers={"Content-Type": "text/plain"},
         )
         # FastAPI might still parse it as JSON, but let's see what happens
@@ -232,23 +318,71 @@ class TestMessageValidation:
         assert response.status_code == 422  # Validation error
 
 
-@pytest.mark.asyncio
 class TestAsyncChatCompletions:
     """Test async functionality of chat completions."""
 
     async def test_async_chat_completion(
-        self, client: TestClient, chat_request_data, mock_llm
+        self, aclient: httpx.AsyncClient, chat_request_data, mock_llm
     ):
         """Test async chat completion request."""
-        response = client.post("/v1/chat/completions", json=chat_request_data)
+        response = await aclient.post("/v1/chat/completions", json=chat_request_data)
         assert response.status_code == 200
-        data = response.json()
+        data = json_of(response)
         assert data["choices"][0]["message"]["content"] == "Mocked AI response"
 
     async def test_async_streaming_chat_completion(
-        self, client: TestClient, streaming_chat_request_data, mock_llm
+        self, aclient: httpx.AsyncClient, streaming_chat_request_data, mock_llm
     ):
         """Test async streaming chat completion."""
-        response = client.post("/v1/chat/completions", json=streaming_chat_request_data)
+        response = await aclient.post(
+            "/v1/chat/completions", json=streaming_chat_request_data
+        )
         assert response.status_code == 200
-        assert "text/plain" in response.headers["content-type"]
+        assert "text/event-stream" in response.headers["content-type"]
+
+    async def test_concurrent_chat_completions(
+        self, aclient: httpx.AsyncClient, chat_request_bytes, mock_llm
+    ):
+        """Test several chat completions served concurrently on one loop."""
+        responses = await asyncio.gather(
+            *(
+                aclient.post(
+                    "/v1/chat/completions",
+                    content=chat_request_bytes,
+                    headers={"Content-Type": "application/json"},
+                )
+                for _ in range(10)
+            )
+        )
+        assert all(response.status_code == 200 for response in responses)
+
+    async def test_streaming_batches_small_frames(self):
+        """Test streamed tokens are coalesced after the first one is flushed."""
+        response = _stream_response(
+            [], FakeStreamingLLM(20), "test-model", FakeRequest()
+        )
+        frames = [frame async for frame in response.body_iterator]
+
+        # The first token goes out alone to keep time-to-first-token low
+        assert frames[0].count(b"data: ") == 1
+        # The remaining tokens share far fewer writes than one per token
+        assert len(frames) < 20
+
+        body = b"".join(frames)
+        assert body.count(b'"content":') == 20
+        assert body.endswith(b"data: [DONE]\n\n")
+
+    async def test_streaming_stops_on_client_disconnect(self):
+        """Test the upstream stream is closed once the client disconnects."""
+        llm = FakeStreamingLLM(100)
+        response = _stream_response(
+            [], llm, "test-model", FakeRequest(disconnect_after=1)
+        )
+        frames = [frame async for frame in response.body_iterator]
+
+        # Only the first flush reaches the client, and no [DONE] is sent
+        assert len(frames) == 1
+        assert b"[DONE]" not in frames[0]
+        # Generation stopped early and the upstream generator was closed
+        assert llm.produced < 100
+        assert llm.closed